@@ -0,0 +1,96 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT_SEC = 10
+READ_TIMEOUT_SEC = 30
+RETRIES = 3            # for GETs; a submit is only re-sent to another backend if it never arrived
+BACKOFF_SEC = 0.5      # 0.5 s, 1 s, 2 s between retries
+POOL_SIZE = 16         # kept-alive connections per backend, shared by all sessions
+POLL_TIMEOUT_SEC = 5   # a slow poll is dropped; the next one comes 2 s later anyway
+
+
+class BackendUnavailable(Exception):
+    pass
+
+
+class BackendClient:
+    """One pooled HTTP session to the generation backends, shared by every Streamlit session.
+
+    Keep-alive connections mean a request through the tunnel does not pay a new
+    TLS handshake. GETs are idempotent, so they are retried with backoff on
+    connection errors and 502/503/504. A new job goes to the first backend that
+    takes it, starting with the one that last worked.
+    """
+
+    def __init__(self, urls):
+        self.urls = [url.rstrip("/") for url in urls]
+        self._preferred = 0
+        self._lock = threading.Lock()
+        retry = Retry(
+            total=RETRIES,
+            backoff_factor=BACKOFF_SEC,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session = self._pooled_session(retry)
+        # urllib3 retries connection errors whatever the method, so submits get
+        # their own pool without retries and fail over straight away instead;
+        # polls use it too, since the next poll is the retry
+        self._no_retry_session = self._pooled_session(Retry(0, read=False))
+
+    def _pooled_session(self, retry):
+        adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=POOL_SIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _in_preferred_order(self):
+        with self._lock:
+            start = self._preferred
+        return self.urls[start:] + self.urls[:start]
+
+    def submit(self, payload):
+        """POST /generate; returns (backend URL, response) from the first backend that answers.
+
+        Moves on to the next backend when one cannot be reached, is full (503)
+        or is down behind its tunnel (502/504).
+        Raises BackendUnavailable when none could be reached.
+        """
+        response_url, response = None, None
+        for url in self._in_preferred_order():
+            try:
+                r = self._no_retry_session.post(f"{url}/generate", json=payload,
+                                                timeout=(CONNECT_TIMEOUT_SEC, READ_TIMEOUT_SEC))
+            except requests.ConnectionError:
+                continue
+            response_url, response = url, r
+            if r.status_code not in (502, 503, 504):
+                with self._lock:
+                    self._preferred = self.urls.index(url)
+                return url, r
+        if response is None:
+            raise BackendUnavailable("No backend could be reached")
+        return response_url, response
+
+    def get(self, url, path, timeout=(CONNECT_TIMEOUT_SEC, READ_TIMEOUT_SEC), **kwargs):
+        """GET a path on one backend (jobs live on the backend that took them), with retries."""
+        return self.session.get(f"{url}{path}", timeout=timeout, **kwargs)
+
+    def poll(self, url, path, **kwargs):
+        """GET for status polling: one try with a short timeout, so a slow backend never stalls the page."""
+        return self._no_retry_session.get(f"{url}{path}", timeout=POLL_TIMEOUT_SEC, **kwargs)
+
+    def locate_job(self, job_id):
+        """Return the URL of the backend that knows job_id, or None."""
+        for url in self.urls:
+            try:
+                if self.poll(url, f"/jobs/{job_id}").ok:
+                    return url
+            except requests.RequestException:
+                continue
+        return None
@@ -0,0 +1,49 @@
+"""Build the compressed background images that the UI serves as static files.
+
+frontend.py runs this on start-up for the images it uses, and only rebuilds
+files whose source changed. Run it by hand to rebuild everything up front:
+
+    python build_assets.py
+"""
+import glob
+import os
+from PIL import Image, features
+
+STATIC_DIR = "static/backgrounds"   # served as app/static/backgrounds/ (see .streamlit/config.toml)
+MAX_WIDTH = 1920                    # backgrounds never need more than a full-HD screen
+SAVE_OPTIONS = {                    # best format first; only types Streamlit's static serving labels correctly
+    "webp": {"quality": 75, "method": 6},
+    "jpeg": {"quality": 80, "optimize": True, "progressive": True},
+}
+FORMATS = [fmt for fmt in SAVE_OPTIONS if fmt == "jpeg" or features.check(fmt)]
+
+
+def _is_fresh(output, source):
+    return os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(source)
+
+
+def build_backgrounds(image_list, out_dir=STATIC_DIR, max_width=MAX_WIDTH):
+    """Write each image in every supported format; returns {format: file name} per image."""
+    os.makedirs(out_dir, exist_ok=True)
+    built = []
+    for path in image_list:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        outputs = {fmt: f"{stem}.{fmt}" for fmt in FORMATS}
+        stale = [fmt for fmt, name in outputs.items() if not _is_fresh(os.path.join(out_dir, name), path)]
+        if stale:
+            with Image.open(path) as img:
+                img.draft("RGB", (max_width, max_width))  # let the JPEG decoder downscale for free
+                img = img.convert("RGB")
+                if img.width > max_width:
+                    img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+                for fmt in stale:
+                    img.save(os.path.join(out_dir, outputs[fmt]), fmt.upper(), **SAVE_OPTIONS[fmt])
+        built.append(outputs)
+    return built
+
+
+if __name__ == "__main__":
+    for outputs in build_backgrounds(sorted(glob.glob("images/img_bg*.jpg"))):
+        for name in outputs.values():
+            size = os.path.getsize(os.path.join(STATIC_DIR, name))
+            print(f"{name}: {size / 1024:.0f} KB")
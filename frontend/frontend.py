@@ -1,12 +1,18 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import base64
-import requests
-import zipfile
 import os
-import shutil
+import uuid
+import requests
+from build_assets import build_backgrounds
+from backend_client import BackendClient, BackendUnavailable
+from history_store import HistoryStore, PAGE_SIZE
 
 NGROK_URL = "https://b606-34-125-152-179.ngrok-free.app"
+# Comma-separated backend URLs; new jobs fail over to the next one when a backend is down or full
+BACKEND_URLS = os.environ.get("BACKEND_URLS", NGROK_URL).split(",")
+INFERENCE_PROFILES = ["preview", "standard", "high"]  # must match the backend's profiles
+SD_MODELS = ["dreamshaper", "sd-1.5", "waifu", "arcane"]  # must match the backend's SD_MODELS
 
 # List of background images for the slideshow
 background_images = [
@@ -20,15 +26,17 @@ background_images = [
     "images/img_bg8.jpg"
 ]
 
-# Function to add background slideshow using only CSS
-def add_bg_from_local_slideshow_css(image_list, interval_sec=5):
-    encoded_images = []
-    for path in image_list:
-        with open(path, "rb") as file:
-            encoded = base64.b64encode(file.read()).decode()
-            encoded_images.append(f"data:image/png;base64,{encoded}")
-
-    num_images = len(encoded_images)
+# Background slideshow using only CSS. The images are built once into small
+# WebP/JPEG files under static/ and referenced by URL, so the page stays light
+# and reruns don't re-read or re-encode anything.
+@st.cache_data
+def background_slideshow_css(image_list, interval_sec=5):
+    urls = []
+    for outputs in build_backgrounds(image_list):
+        sources = [f'url("app/static/backgrounds/{name}") type("image/{fmt}")' for fmt, name in outputs.items()]
+        urls.append(f"image-set({', '.join(sources)})")
+
+    num_images = len(urls)
     percent_per_image = 100 / num_images
 
     keyframes = ""
@@ -36,11 +44,11 @@ def add_bg_from_local_slideshow_css(image_list, interval_sec=5):
         percent_start = i * percent_per_image
         percent_end = (i + 1) * percent_per_image
         keyframes += f"""
-        {percent_start}% {{ background-image: url('{encoded_images[i]}'); }}
-        {percent_end}% {{ background-image: url('{encoded_images[i]}'); }}
+        {percent_start}% {{ background-image: {urls[i]}; }}
+        {percent_end}% {{ background-image: {urls[i]}; }}
         """
 
-    css = f"""
+    return f"""
     <style>
     .stApp {{
         background-size: cover;
@@ -56,7 +64,8 @@ def add_bg_from_local_slideshow_css(image_list, interval_sec=5):
     </style>
     """
 
-    st.markdown(css, unsafe_allow_html=True)
+def add_bg_from_local_slideshow_css(image_list, interval_sec=5):
+    st.markdown(background_slideshow_css(image_list, interval_sec), unsafe_allow_html=True)
 
 def add_video_background(video_path: str):
     with open(video_path, "rb") as video_file:
@@ -82,6 +91,102 @@ def add_video_background(video_path: str):
     """
     st.markdown(video_html, unsafe_allow_html=True)
 
+# One pooled, retrying client per process, shared across reruns and sessions
+@st.cache_resource
+def get_backend():
+    return BackendClient(BACKEND_URLS)
+
+# Prompt history lives in SQLite, shared by all sessions of this process
+@st.cache_resource
+def get_history():
+    return HistoryStore()
+
+def show_history(user_id, kind):
+    # Renders one page of PAGE_SIZE entries, newest first; the cursor stack holds
+    # the id each older page starts below, so every page is one indexed query
+    cursors = st.session_state.setdefault(f"{kind}_history_cursors", [])
+    entries = get_history().latest(user_id, kind, limit=PAGE_SIZE + 1,
+                                   before_id=cursors[-1] if cursors else None)
+    has_older, entries = len(entries) > PAGE_SIZE, entries[:PAGE_SIZE]
+    for idx, entry in enumerate(entries, len(cursors) * PAGE_SIZE + 1):
+        with st.chat_message("user"):
+            st.markdown(f"**Prompt {idx}:** {entry['prompt']}")
+        with st.chat_message("assistant"):
+            st.markdown(entry["response"])
+            if entry["artifact"] and entry["backend"]:
+                # Artifacts stay on the backend; history only loads the small preview,
+                # which the browser streams and seeks with range requests
+                artifact_url = f"{entry['backend']}/artifacts/{entry['artifact']}"
+                st.video(f"{artifact_url}.preview.mp4", format="video/mp4")
+                st.markdown(f"[Full video]({artifact_url}.mp4)")
+
+    col_newer, col_older = st.columns((1, 1))
+    with col_newer:
+        if cursors and st.button("⬅️ Newer", key=f"{kind}_history_newer"):
+            cursors.pop()
+            st.rerun()
+    with col_older:
+        if has_older and st.button("Older ➡️", key=f"{kind}_history_older"):
+            cursors.append(entries[-1]["id"])
+            st.rerun()
+
+JOB_FIELDS = ("id", "status", "stage", "progress", "error")
+
+def start_video_job(backend_url, job):
+    # The job ID also goes into the URL, so a refresh or reconnect picks the same job up again
+    # A job whose images and video were all cached comes back already done
+    video = job["artifacts"]["video"] if job["status"] == "done" else None
+    st.session_state.video_job = {k: job[k] for k in JOB_FIELDS}
+    st.session_state.video_job.update(backend=backend_url, video=video)
+    st.session_state.video_images = []
+    st.query_params["job"] = job["id"]
+    if video is not None:
+        get_history().set_artifact(job["id"], video)
+
+@st.fragment(run_every=2)
+def video_job_panel():
+    # Reruns on its own every few seconds without blocking the rest of the page;
+    # each run fetches only the images that finished since the last one
+    job = st.session_state.video_job
+    if job is None:
+        return
+    # A job that was already done when it started still needs its images once
+    if job["status"] not in ("done", "failed") or job["status"] == "done" and not st.session_state.video_images:
+        if job["backend"] is None:  # resumed from the URL: find the backend that has it
+            job["backend"] = get_backend().locate_job(job["id"])
+        try:
+            r = None if job["backend"] is None else get_backend().poll(
+                job["backend"], f"/jobs/{job['id']}/images", params={"since": len(st.session_state.video_images)})
+        except requests.RequestException:
+            r = None  # show what we have and try again on the next run
+        if job["backend"] is None or r is not None and r.status_code == 404:
+            st.session_state.video_job = None
+            del st.query_params["job"]
+            st.warning("That job has expired, please generate it again")
+            return
+        if r is not None and r.ok:
+            update = r.json()
+            st.session_state.video_images += [(item["artifact"], item["caption"]) for item in update.pop("images")]
+            job.update({k: update[k] for k in JOB_FIELDS})
+            if job["status"] == "done":
+                job["video"] = update["artifacts"]["video"]
+                get_history().set_artifact(job["id"], job["video"])
+
+    if job["status"] not in ("done", "failed"):
+        st.progress(job["progress"], text=job["stage"])
+    for artifact, caption in st.session_state.video_images:
+        # The browser loads the thumbnails straight from the artifact store; the PNG only on request
+        artifact_url = f"{job['backend']}/artifacts/{artifact}"
+        st.image(f"{artifact_url}.thumb.webp", caption=caption)
+        st.markdown(f"[Full size]({artifact_url}.png)")
+
+    if job["status"] == "failed":
+        st.error(f"Generation failed: {job['error']}")
+    elif job["status"] == "done":
+        # The backend narrates and assembles the video once the images are done
+        # The browser streams it straight from the artifact store, seeking with range requests
+        st.video(f"{job['backend']}/artifacts/{job['video']}.mp4", format="video/mp4")
+
 
 # ----------------------------------------
 # App UI starts here
@@ -89,6 +194,11 @@ def add_video_background(video_path: str):
 
 st.set_page_config(page_title='Fission AI', page_icon='images/ai_icon.png', layout="centered")
 st.markdown("## FISSION AI ✨")
+
+# Anonymous per-browser user ID, kept in the URL so the history survives refreshes
+if "user" not in st.query_params:
+    st.query_params["user"] = uuid.uuid4().hex
+user_id = st.query_params["user"]
 #st.divider()
 
 # Sidebar Menu
@@ -114,15 +224,22 @@ with st.sidebar:
     col33, col44 =  st.columns((1,1))
     with col33:
         if st.button("🗑️ Clear Data"):
-            st.session_state.image_history = []
+            get_history().clear(user_id)
+            for kind in ("image", "video"):
+                st.session_state.pop(f"{kind}_history_cursors", None)
     with col44:
         st.button("⚙️ Account")
 
 
 
-# Session state to hold history
-if 'image_history' not in st.session_state:
-    st.session_state.image_history = []
+# Video job being followed, resumed from the URL after a refresh
+if 'video_job' not in st.session_state:
+    st.session_state.video_job = None
+    st.session_state.video_images = []
+    if "job" in st.query_params:
+        st.session_state.video_job = {"id": st.query_params["job"], "status": "queued",
+                                      "stage": "Reconnecting", "progress": 0.0, "error": None, "backend": None,
+                                      "video": None}
 
 # Main Area
 if selected == "🖼️ Text to Image Model":
@@ -146,15 +263,11 @@ if selected == "🖼️ Text to Image Model":
     # On submit
     if submit and prompt:
         response = f"🖼️ Generated image for: **{prompt}**"
-        st.session_state.image_history.append((prompt, response))
+        get_history().add(user_id, "image", prompt, response)
 
     
     # Display conversation-like history
-    for idx, (user_prompt, response) in enumerate(reversed(st.session_state.image_history), 1):
-        with st.chat_message("user"):
-            st.markdown(f"**Prompt {idx}:** {user_prompt}")
-        with st.chat_message("assistant"):
-            st.markdown(response)
+    show_history(user_id, "image")
 
 elif selected == "🎞️ Text to Video Model":
     add_video_background("videos/backvid.mp4")  # ✅ Path to your video
@@ -165,41 +278,34 @@ elif selected == "🎞️ Text to Video Model":
     # Input
     #with st.form(key="video_prompt_form", clear_on_submit=True):
     prompt = st.text_input(label="Enter prompt", placeholder="e.g. cat and dog are fighting")
+    col_model, col_profile = st.columns((1, 1))
+    with col_model:
+        model = st.selectbox("Style", SD_MODELS, help="A style that is not loaded yet takes longer the first time")
+    with col_profile:
+        profile = st.selectbox("Quality", INFERENCE_PROFILES, index=INFERENCE_PROFILES.index("standard"),
+                               help="Preview renders fast at lower quality, high takes longest")
     #submit = st.form_submit_button("Generate")
     submit = st.button('Generate')
 
     # On submit
     if submit and prompt:
-        response = f"🎞️ Generated video for: **{prompt}**"
-        st.session_state.image_history.append((prompt, response))
         with st.spinner("Sending prompt to backend..."):
-            response = requests.post(f"{NGROK_URL}/generate", json={"prompt": prompt})
-        if response.ok:
-            download_url = response.json()["download_url"]
-            zip_path = "output.zip"
-
-            with st.spinner("Downloading and extracting files..."):
-                with requests.get(download_url, stream=True) as r:
-                    with open(zip_path, "wb") as f:
-                        shutil.copyfileobj(r.raw, f)
-
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall("output")
-
-                st.success("Files extracted!")
-
-            # Now call convert_video.py
-            from convert_video import create_video_with_audio
-            video_path = create_video_with_audio("output")
-
-            st.video(video_path)
-        else:
-            st.error("Error from backend")
-
+            try:
+                backend_url, response = get_backend().submit({"prompt": prompt, "model": model, "profile": profile})
+            except (BackendUnavailable, requests.RequestException):
+                backend_url, response = None, None
+        if response is None:
+            st.error("Could not reach the backend, please try again shortly")
+        elif not response.ok:
+            st.error("Backend is busy, please try again shortly" if response.status_code == 503 else "Error from backend")
+        job = response.json() if response is not None and response.ok else None
+        get_history().add(user_id, "video", prompt, f"🎞️ Generated video for: **{prompt}**",
+                          job_id=job["id"] if job else None, backend=backend_url if job else None)
+        if job is not None:
+            # The backend queues the job; the panel below follows it as images come in
+            start_video_job(backend_url, job)
+
+    video_job_panel()
 
     # Display conversation-like history
-    for idx, (user_prompt, response) in enumerate(reversed(st.session_state.image_history), 1):
-        with st.chat_message("user"):
-            st.markdown(f"**Prompt {idx}:** {user_prompt}")
-        with st.chat_message("assistant"):
-            st.markdown(response)
+    show_history(user_id, "video")
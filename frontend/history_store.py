@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+import time
+
+HISTORY_DB = "history.db"
+PAGE_SIZE = 10      # history entries rendered per page
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id       INTEGER PRIMARY KEY,
+    user_id  TEXT NOT NULL,
+    kind     TEXT NOT NULL,   -- "image" or "video"
+    prompt   TEXT NOT NULL,
+    response TEXT NOT NULL,
+    job_id   TEXT,            -- backend job holding the generated artifacts
+    backend  TEXT,            -- URL of the backend that ran it
+    artifact TEXT,            -- ID of the video in the backend's artifact store, once done
+    created  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_by_user ON history (user_id, kind, id);
+CREATE INDEX IF NOT EXISTS history_by_job ON history (job_id);
+"""
+
+
+class HistoryStore:
+    """Prompt history per user, kept in SQLite instead of session memory.
+
+    Entries hold text and the IDs of the job and artifact that came out of it,
+    never the images or videos themselves, so a long history costs neither
+    memory nor page weight.
+    One connection is shared by all Streamlit sessions, behind a lock.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def add(self, user_id, kind, prompt, response, job_id=None, backend=None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO history (user_id, kind, prompt, response, job_id, backend, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, kind, prompt, response, job_id, backend, time.time()),
+            )
+        return cursor.lastrowid
+
+    def set_artifact(self, job_id, artifact):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE history SET artifact = ? WHERE job_id = ?", (artifact, job_id))
+
+    def latest(self, user_id, kind, limit=PAGE_SIZE, before_id=None):
+        """Newest entries first, at most limit of them, older than before_id if given."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM history WHERE user_id = ? AND kind = ? AND id < ?"
+                " ORDER BY id DESC LIMIT ?",
+                (user_id, kind, before_id if before_id is not None else 2**63 - 1, limit),
+            ).fetchall()
+
+    def clear(self, user_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history WHERE user_id = ?", (user_id,))